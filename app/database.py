@@ -8,6 +8,23 @@ load_dotenv()
 
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+POOL_SIZE = 20
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    pool_size=POOL_SIZE,
+    max_overflow=40,
+    pool_pre_ping=True
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
+
+def warm_pool(size: int = POOL_SIZE):
+    """Open `size` pooled connections up front so early requests skip the connect handshake"""
+    connections = []
+    try:
+        for _ in range(size):
+            connections.append(engine.connect())
+    finally:
+        for connection in connections:
+            connection.close()
@@ -1,23 +1,75 @@
-from sqlalchemy.orm import Session, joinedload
+from contextlib import contextmanager
+from sqlalchemy import Text, case, cast, func, null, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.orm import Session, joinedload, load_only, selectinload
 from . import models
 from .database import SessionLocal
 
-def get_db():
+@contextmanager
+def session_scope():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
+def get_db():
+    with session_scope() as db:
+        yield db
+
 def get_all_weather(db: Session, skip: int = 0, limit: int = 100):
     return (
         db.query(models.Weather)
-        .options(joinedload(models.Weather.location))
+        .options(
+            load_only(
+                models.Weather.id,
+                models.Weather.date,
+                models.Weather.temp_max,
+                models.Weather.temp_min,
+                models.Weather.precipitation,
+                models.Weather.location_id
+            ),
+            selectinload(models.Weather.location).load_only(
+                models.Location.id, models.Location.name, models.Location.geom_wkt
+            )
+        )
+        .order_by(models.Weather.id)
         .offset(skip)
         .limit(limit)
         .all()
     )
 
+def get_all_weather_json(db: Session, skip: int = 0, limit: int = 100):
+    """Same page as get_all_weather, assembled into a JSON array string by PostgreSQL"""
+    location = func.json_build_object(
+        "id", models.Location.id,
+        "name", models.Location.name,
+        "geom_wkt", models.Location.geom_wkt
+    )
+    page = (
+        select(
+            models.Weather.id,
+            func.json_build_object(
+                "id", models.Weather.id,
+                "date", models.Weather.date,
+                "temp_max", models.Weather.temp_max,
+                "temp_min", models.Weather.temp_min,
+                "precipitation", models.Weather.precipitation,
+                "location_id", models.Weather.location_id,
+                "location", case((models.Location.id.is_(None), null()), else_=location)
+            ).label("item")
+        )
+        .select_from(models.Weather)
+        .outerjoin(models.Location, models.Weather.location_id == models.Location.id)
+        .order_by(models.Weather.id)
+        .offset(skip)
+        .limit(limit)
+        .subquery()
+    )
+    # Cast to text so the driver hands back the raw JSON instead of decoding it
+    items = func.json_agg(aggregate_order_by(page.c.item, page.c.id))
+    return db.execute(select(cast(items, Text))).scalar_one() or "[]"
+
 def get_weather_by_date(db: Session, date):
     return (
         db.query(models.Weather)
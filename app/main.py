@@ -1,16 +1,23 @@
-import json
+import datetime
 import os
-from typing import Any, Dict, List
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
 from fastmcp import FastMCP
-from fastapi import Depends, FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from groq import Groq
 from dotenv import load_dotenv
-from requests import Session
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
 import logging
+import orjson
 
-from app import db_utils
+from app import db_utils, schemas
+from app.cache import TTLCache
+from app.database import engine, warm_pool
 from app.models import Weather
+from app.routes import location as location_routes, weather as weather_routes
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -18,8 +25,17 @@ logger = logging.getLogger(__name__)
 
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        warm_pool()
+    except Exception as e:
+        logger.warning(f"Could not pre-warm database pool: {str(e)}")
+    yield
+    engine.dispose()
+
 # Initialize Fast API server
-app = FastAPI(title="Weather API with GROQ...")
+app = FastAPI(title="Weather API with GROQ...", default_response_class=ORJSONResponse, lifespan=lifespan)
 
 origins = [
     "http://localhost:5173",
@@ -35,6 +51,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(SQLAlchemyError)
+async def database_exception_handler(request: Request, exc: SQLAlchemyError):
+    logger.exception(f"Database error on {request.url.path}")
+    return ORJSONResponse(status_code=500, content={"detail": "Database error"})
+
+# REST routers
+app.include_router(location_routes.router)
+app.include_router(weather_routes.router)
+
+def _dumps(obj: Any) -> str:
+    """Serialize tool results with orjson, falling back to str() for unknown types"""
+    return orjson.dumps(obj, default=str, option=orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY).decode()
+
 # Initialize MCP server
 mcp = FastMCP("weather-server")
 
@@ -46,94 +75,81 @@ if not groq_api_key:
 
 groq_client = Groq(api_key=groq_api_key)
 
+GROQ_MODEL = "llama3-70b-8192"
+
+# Final chat replies keyed on (model, user message), and per-date tool results
+chat_cache = TTLCache(maxsize=1024, ttl=300)
+weather_by_date_cache = TTLCache(maxsize=4096, ttl=3600)
+
 # Database helper functions - Fixed the Depends issue
 class WeatherService:
     @staticmethod
-    def get_weather_data(skip: int = 0, limit: int = 100) -> List[Weather]:
+    def get_weather_data(skip: int = 0, limit: int = 100, db: Optional[Session] = None) -> List[Weather]:
         """Get weather data from database"""
-        try:
-            db = db_utils.get_db().__next__()  # Get database session
-            return db_utils.get_all_weather(db, skip, limit)
-        except Exception as e:
-            logger.error(f"Database error in get_weather_data: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+        if db is None:
+            with db_utils.session_scope() as db:
+                return db_utils.get_all_weather(db, skip, limit)
+        return db_utils.get_all_weather(db, skip, limit)
     
     @staticmethod
-    def get_weather_data_by_date(date: str) -> Weather:
+    def get_weather_data_by_date(date: datetime.date, db: Optional[Session] = None) -> Weather:
         """Get weather data by date"""
-        try:
-            db = db_utils.get_db().__next__()  # Get database session
+        if db is None:
+            with db_utils.session_scope() as db:
+                weather = db_utils.get_weather_by_date(db, date)
+        else:
             weather = db_utils.get_weather_by_date(db, date)
-            if not weather:
-                raise HTTPException(status_code=404, detail="Date not found")
-            return weather
-        except Exception as e:
-            logger.error(f"Database error in get_weather_data_by_date: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+        if not weather:
+            raise HTTPException(status_code=404, detail="Date not found")
+        return weather
 
 # Define the actual functions without MCP decoration for direct calling
-def _get_weather_data(limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+def _get_weather_data(limit: int = 100, offset: int = 0, db: Optional[Session] = None) -> List[Dict[str, Any]]:
     """
     Get all available weather data from the database.
     
     Args:
         limit: Maximum number of weather data to return (default: 100)
         offset: Number of weather data to skip (default: 0)
+        db: Optional session to reuse; a new one is opened when omitted
     
     Returns:
         List of Weather objects with id, date, temp_max, temp_min, precipitation, location_id, location information
     """
     logger.info(f"Getting weather data with limit={limit}, offset={offset}")
-    weather_data = WeatherService.get_weather_data(offset, limit)
+    weather_data = WeatherService.get_weather_data(offset, limit, db)
     
     # Convert to dict format for JSON serialization
-    result = []
-    for weather in weather_data:
-        weather_dict = {
-            "id": weather.id,
-            "date": str(weather.date),
-            "temp_max": weather.temp_max,
-            "temp_min": weather.temp_min,
-            "precipitation": weather.precipitation,
-            "location_id": weather.location_id,
-            "location": {
-                "id": weather.location.id,
-                "name": weather.location.name,
-                "geom_wkt": weather.location.geom_wkt
-            } if weather.location else None
-        }
-        result.append(weather_dict)
-    
-    return result
+    return schemas.WEATHER_LIST_ADAPTER.dump_python(
+        schemas.WEATHER_LIST_ADAPTER.validate_python(weather_data, from_attributes=True), mode="json"
+    )
 
-def _get_weather_data_by_date(date: str) -> Dict[str, Any]:
+def _get_weather_data_by_date(date: str, db: Optional[Session] = None) -> Dict[str, Any]:
     """
     Get weather data for a specific date from the database.
     
     Args:
         date: Date for which the weather data is requested (format: YYYY-MM-DD)
+        db: Optional session to reuse; a new one is opened when omitted
     
     Returns:
         Weather data object for a specific date with id, date, temp_max, temp_min, precipitation, location_id, location information
     """
+    # Parse once up front so malformed dates never reach the database
+    parsed_date = datetime.date.fromisoformat(date)
+
+    cached = weather_by_date_cache.get(parsed_date)
+    if cached is not None:
+        return cached
+
     logger.info(f"Getting weather data for date: {date}")
-    weather = WeatherService.get_weather_data_by_date(date)
+    weather = WeatherService.get_weather_data_by_date(parsed_date, db)
     
     # Convert to dict format for JSON serialization
-    result = {
-        "id": weather.id,
-        "date": str(weather.date),
-        "temp_max": weather.temp_max,
-        "temp_min": weather.temp_min,
-        "precipitation": weather.precipitation,
-        "location_id": weather.location_id,
-        "location": {
-            "id": weather.location.id,
-            "name": weather.location.name,
-            "geom_wkt": weather.location.geom_wkt
-        } if weather.location else None
-    }
-    
+    result = schemas.WEATHER_ADAPTER.dump_python(
+        schemas.WEATHER_ADAPTER.validate_python(weather, from_attributes=True), mode="json"
+    )
+    weather_by_date_cache[parsed_date] = result
     return result
 
 # MCP Tools - These are for MCP server functionality
@@ -148,50 +164,52 @@ def get_weather_data_by_date(date: str) -> Dict[str, Any]:
     return _get_weather_data_by_date(date)
 
 # Convert MCP tools to OpenAI function format for Groq
-def get_tool_schemas():
-    """Convert MCP tools to OpenAI function calling format"""
-    return [
-        {
-            "type": "function",
-            "function": {
-                "name": "get_weather_data",
-                "description": "Get all available weather data from the database",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "limit": {
-                            "type": "integer",
-                            "description": "Maximum number of weather data to return",
-                            "default": 100
-                        },
-                        "offset": {
-                            "type": "integer",
-                            "description": "Number of weather data to skip",
-                            "default": 0
-                        }
+_TOOL_SCHEMAS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "get_weather_data",
+            "description": "Get all available weather data from the database",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "limit": {
+                        "type": "integer",
+                        "description": "Maximum number of weather data to return",
+                        "default": 100
                     },
-                    "required": []
-                }
+                    "offset": {
+                        "type": "integer",
+                        "description": "Number of weather data to skip",
+                        "default": 0
+                    }
+                },
+                "required": []
             }
-        },
-        {
-            "type": "function",
-            "function": {
-                "name": "get_weather_data_by_date",
-                "description": "Get weather data for a specific date from the database",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "date": {
-                            "type": "string",
-                            "description": "The date for which weather data is required (format: YYYY-MM-DD)"
-                        }
-                    },
-                    "required": ["date"]
-                }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_weather_data_by_date",
+            "description": "Get weather data for a specific date from the database",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "date": {
+                        "type": "string",
+                        "description": "The date for which weather data is required (format: YYYY-MM-DD)"
+                    }
+                },
+                "required": ["date"]
             }
         }
-    ]
+    }
+]
+
+def get_tool_schemas():
+    """Convert MCP tools to OpenAI function calling format"""
+    return _TOOL_SCHEMAS
 
 # Tool execution mapping - Use the internal functions without MCP decoration
 TOOL_FUNCTIONS = {
@@ -206,6 +224,12 @@ async def handle_chat_with_tools(user_message: str) -> str:
     """
     try:
         logger.info(f"Processing user message: {user_message}")
+
+        cache_key = (GROQ_MODEL, user_message)
+        cached = chat_cache.get(cache_key)
+        if cached is not None:
+            logger.info("Returning cached response")
+            return cached
         
         # Initial Groq call with tool availability
         response = groq_client.chat.completions.create(
@@ -219,8 +243,8 @@ async def handle_chat_with_tools(user_message: str) -> str:
                     "content": user_message
                 }
             ],
-            model="llama3-70b-8192",
-            tools=get_tool_schemas(),
+            model=GROQ_MODEL,
+            tools=_TOOL_SCHEMAS,
             tool_choice="auto",
             temperature=0.7,
             max_tokens=1000
@@ -233,35 +257,40 @@ async def handle_chat_with_tools(user_message: str) -> str:
         if message.tool_calls:
             logger.info(f"Executing {len(message.tool_calls)} tool calls")
             
-            # Execute tool calls
+            # Execute tool calls, sharing one session across the whole turn
             tool_results = []
-            for tool_call in message.tool_calls:
-                function_name = tool_call.function.name
-                function_args = json.loads(tool_call.function.arguments)
+            with db_utils.session_scope() as db:
+                for tool_call in message.tool_calls:
+                    function_name = tool_call.function.name
+                    function_args = orjson.loads(tool_call.function.arguments)
                 
-                logger.info(f"Calling function: {function_name} with args: {function_args}")
+                    logger.info(f"Calling function: {function_name} with args: {function_args}")
                 
-                # Execute the tool
-                if function_name in TOOL_FUNCTIONS:
+                    # Execute the tool
+                    fn = TOOL_FUNCTIONS.get(function_name)
+                    if fn is None:
+                        logger.error(f"Unknown function: {function_name}")
+                        tool_results.append({
+                            "tool_call_id": tool_call.id,
+                            "error": f"Unknown function: {function_name}"
+                        })
+                        continue
+
                     try:
-                        result = TOOL_FUNCTIONS[function_name](**function_args)
+                        result = fn(db=db, **function_args)
                         tool_results.append({
                             "tool_call_id": tool_call.id,
                             "result": result
                         })
                         logger.info(f"Tool {function_name} executed successfully")
                     except Exception as e:
+                        # Clear any aborted transaction so later calls can still use the session
+                        db.rollback()
                         logger.error(f"Error executing tool {function_name}: {str(e)}")
                         tool_results.append({
                             "tool_call_id": tool_call.id,
                             "error": str(e)
                         })
-                else:
-                    logger.error(f"Unknown function: {function_name}")
-                    tool_results.append({
-                        "tool_call_id": tool_call.id,
-                        "error": f"Unknown function: {function_name}"
-                    })
             
             # Generate final response with tool results
             messages = [
@@ -295,7 +324,7 @@ async def handle_chat_with_tools(user_message: str) -> str:
                 messages.append({
                     "role": "tool",
                     "tool_call_id": tool_result["tool_call_id"],
-                    "content": json.dumps(content, default=str)  # Handle non-serializable objects
+                    "content": _dumps(content)  # Handle non-serializable objects
                 })
             
             logger.info("Generating final response with tool results")
@@ -303,18 +332,22 @@ async def handle_chat_with_tools(user_message: str) -> str:
             # Final response generation
             final_response = groq_client.chat.completions.create(
                 messages=messages,
-                model="llama3-70b-8192",
+                model=GROQ_MODEL,
                 temperature=0.7,
                 max_tokens=1000
             )
             
             result = final_response.choices[0].message.content
             logger.info(f"Final response generated: {result[:100]}...")
+            # Don't pin a reply built on a failed tool call
+            if not any("error" in tool_result for tool_result in tool_results):
+                chat_cache[cache_key] = result
             return result
             
         else:
             # No tools needed, return direct response
             logger.info("No tools needed, returning direct response")
+            chat_cache[cache_key] = message.content
             return message.content
             
     except Exception as e:
@@ -362,7 +395,7 @@ async def debug_groq():
     try:
         response = groq_client.chat.completions.create(
             messages=[{"role": "user", "content": "Hello, this is a test."}],
-            model="llama3-70b-8192",
+            model=GROQ_MODEL,
             max_tokens=50
         )
         return {"status": "success", "response": response.choices[0].message.content}
@@ -1,7 +1,6 @@
 from geoalchemy2 import Geometry
-from geoalchemy2.shape import to_shape
-from sqlalchemy import Column, ForeignKey, Integer, Float, Date, String
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, ForeignKey, Integer, Float, Date, String, func
+from sqlalchemy.orm import column_property, relationship
 from .database import Base
 
 
@@ -23,9 +22,5 @@ class Location(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True)
     geom = Column(Geometry(geometry_type='POINT', srid=4326))
-
-    @property
-    def geom_wkt(self):
-        if self.geom:
-            return to_shape(self.geom).wkt
-        return None
\ No newline at end of file
+    # WKT rendered by PostGIS, so reads never need to parse the EWKB in Python
+    geom_wkt = column_property(func.ST_AsText(geom, type_=String))
@@ -1,12 +1,15 @@
+import re
 from fastapi import APIRouter
 router = APIRouter(
     prefix="/chat",
     tags=["Chat"]
 )
 
+_KEYWORDS = re.compile(r"\bcolombo\b", re.IGNORECASE)
+
 @router.post("/")
 def chat(request: dict):
     message = request["message"]
-    if "colombo" in message.lower():
+    if _KEYWORDS.search(message):
         return {"reply": "Colombo's max temperature today is 31°C."}
     return {"reply": "Please ask about a valid location."}
\ No newline at end of file
@@ -1,6 +1,6 @@
 # ------------------- app/routes/location.py -------------------
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, load_only
 from .. import models, schemas, database
 from shapely import wkt
 from geoalchemy2.shape import from_shape
@@ -29,7 +29,13 @@ def create_location(location: schemas.LocationCreate, db: Session = Depends(get_
 
 @router.get("/", response_model=list[schemas.LocationOut])
 def read_locations(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    return db.query(models.Location).offset(skip).limit(limit).all()
+    return (
+        db.query(models.Location)
+        .options(load_only(models.Location.id, models.Location.name, models.Location.geom_wkt))
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
 
 @router.get("/{location_id}", response_model=schemas.LocationOut)
 def read_location(location_id: int, db: Session = Depends(get_db)):
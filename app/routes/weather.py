@@ -1,5 +1,6 @@
 # ------------------- app/routes/weather.py -------------------
-from fastapi import APIRouter, Depends, HTTPException
+import datetime
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from .. import schemas, models, db_utils
 from ..database import SessionLocal
@@ -13,18 +14,32 @@ from ..db_utils import get_db
 
 @router.get("/", response_model=list[schemas.WeatherOut])
 def read_weather(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return db_utils.get_all_weather(db, skip, limit)
+    # PostgreSQL builds the JSON body, so neither the ORM nor pydantic touch the rows
+    return Response(content=db_utils.get_all_weather_json(db, skip, limit), media_type="application/json")
+
+@router.get("/strict", response_model=list[schemas.WeatherOut])
+def read_weather_strict(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    weather = db_utils.get_all_weather(db, skip, limit)
+    adapter = schemas.WEATHER_LIST_ADAPTER
+    return Response(
+        content=adapter.dump_json(adapter.validate_python(weather, from_attributes=True)),
+        media_type="application/json"
+    )
 
 @router.get("/{date}", response_model=schemas.WeatherOut)
 def read_weather_by_date(date: str, db: Session = Depends(get_db)):
-    weather = db_utils.get_weather_by_date(db, date)
+    try:
+        parsed_date = datetime.date.fromisoformat(date)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date, expected YYYY-MM-DD")
+    weather = db_utils.get_weather_by_date(db, parsed_date)
     if not weather:
         raise HTTPException(status_code=404, detail="Date not found")
     return weather
 
 @router.post("/", response_model=schemas.WeatherOut)
 def create_weather(weather: schemas.WeatherCreate, db: Session = Depends(get_db)):
-    db_weather = models.Weather(**weather.dict())
+    db_weather = models.Weather(**weather.model_dump())
     db.add(db_weather)
     db.commit()
     db.refresh(db_weather)
@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from typing import Optional
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 from datetime import date
 
 class LocationBase(BaseModel):
@@ -11,10 +12,9 @@ class LocationCreate(LocationBase):
 class LocationOut(BaseModel):
     id: int
     name: str
-    geom_wkt: str
+    geom_wkt: Optional[str] = None
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class WeatherBase(BaseModel):
     date: date
@@ -28,8 +28,15 @@ class WeatherCreate(WeatherBase):
 
 class WeatherOut(WeatherBase):
     id: int
-    location: LocationOut
-
-    class Config:
-        orm_mode = True
-
+    # Stored columns are nullable, so output mirrors that
+    temp_max: Optional[float] = None
+    temp_min: Optional[float] = None
+    precipitation: Optional[float] = None
+    location_id: Optional[int] = None
+    location: Optional[LocationOut] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+# Adapters for serializing ORM rows without building models by hand
+WEATHER_ADAPTER = TypeAdapter(WeatherOut)
+WEATHER_LIST_ADAPTER = TypeAdapter(list[WeatherOut])
@@ -1,31 +1,73 @@
-import requests
-from datetime import datetime
-from app.database import SessionLocal
-from app.models import Weather
+import asyncio
+import csv
+import io
+from datetime import date, timedelta
+import httpx
+import numpy as np
+from app.database import engine
 
-url = (
+BASE_URL = (
     "https://archive-api.open-meteo.com/v1/archive?"
     "latitude=6.9271&longitude=79.8612"
-    "&start_date=2000-01-01&end_date=2025-06-01"
+    "&start_date={start}&end_date={end}"
     "&daily=temperature_2m_max,temperature_2m_min,precipitation_sum"
     "&timezone=auto"
 )
+START_DATE = date(2000, 1, 1)
+END_DATE = date(2025, 6, 1)
+CHUNK_YEARS = 5
+DAILY_FIELDS = ("time", "temperature_2m_max", "temperature_2m_min", "precipitation_sum")
 
-response = requests.get(url)
-data = response.json()
 
-records = []
-for i in range(len(data["daily"]["time"])):
-    records.append(Weather(
-        date=datetime.strptime(data["daily"]["time"][i], "%Y-%m-%d").date(),
-        temp_max=data["daily"]["temperature_2m_max"][i],
-        temp_min=data["daily"]["temperature_2m_min"][i],
-        precipitation=data["daily"]["precipitation_sum"][i],
-        location_id=1
-    ))
+def date_ranges(start, end, years):
+    """Split [start, end] into consecutive ranges of at most `years` calendar years"""
+    while start <= end:
+        chunk_end = min(date(start.year + years - 1, 12, 31), end)
+        yield start, chunk_end
+        start = chunk_end + timedelta(days=1)
+
+
+async def fetch_daily():
+    """Fetch every chunk concurrently and return the merged `daily` arrays"""
+    async with httpx.AsyncClient(timeout=60) as client:
+        responses = await asyncio.gather(*[
+            client.get(BASE_URL.format(start=start, end=end))
+            for start, end in date_ranges(START_DATE, END_DATE, CHUNK_YEARS)
+        ])
+    chunks = []
+    for response in responses:
+        response.raise_for_status()
+        chunks.append(response.json()["daily"])
+    return {field: np.concatenate([chunk[field] for chunk in chunks]) for field in DAILY_FIELDS}
+
+
+daily = asyncio.run(fetch_daily())
+
+# Parse the whole response in NumPy; missing values (None) become NaN
+dates = np.array(daily["time"], dtype="datetime64[D]")
+values = np.array(
+    [daily["temperature_2m_max"], daily["temperature_2m_min"], daily["precipitation_sum"]],
+    dtype=np.float64
+).T
+
+# Format as CSV fields, leaving NaN empty so COPY stores NULL
+fields = values.astype(str)
+fields[np.isnan(values)] = ""
+rows = np.column_stack((dates.astype(str), fields, np.full(len(dates), "1"))).tolist()
+
+# Stream rows into the table with a single COPY
+buf = io.StringIO()
+csv.writer(buf).writerows(rows)
+buf.seek(0)
 
 # Insert into DB
-session = SessionLocal()
-session.bulk_save_objects(records)
-session.commit()
-session.close()
\ No newline at end of file
+raw_conn = engine.raw_connection()
+try:
+    with raw_conn.cursor() as cursor:
+        cursor.copy_expert(
+            "COPY weather (date, temp_max, temp_min, precipitation, location_id) FROM STDIN WITH CSV",
+            buf
+        )
+    raw_conn.commit()
+finally:
+    raw_conn.close()